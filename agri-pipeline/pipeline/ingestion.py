@@ -2,18 +2,107 @@ from __future__ import annotations
 import os
 import duckdb as ddb
 import pandas as pd
-from typing import List
-from .utils import EXPECTED_SCHEMA, get_logger,CHECKPOINT_PATH, load_checkpoint, save_checkpoint
+import pyarrow as pa
+import pyarrow.parquet as pq
+from typing import List, Optional
+from . import utils
+from .utils import EXPECTED_SCHEMA, get_logger, load_checkpoint, save_checkpoint
 
 logger = get_logger("ingestion")
 
+# Rows per Arrow record batch when DuckDB hands a scan result to Arrow
+BATCH_SIZE = 1_000_000
+
+# Reading columns that must be stored as numbers
+NUMERIC_COLUMNS = ("value", "battery_level")
+
+# Errors that mean a file itself cannot be read; anything else is a bug and propagates
+READ_ERRORS = (OSError, pa.ArrowException, ddb.Error)
+
+# Shared in-memory DuckDB connection; callers work on their own `_CON.cursor()`
+_CON = ddb.connect()
+
+
+def _check_schema(filepath: str) -> Optional[str]:
+    """
+    Validate a parquet file's schema from its footer (no row groups are read).
+
+    Column names must match `EXPECTED_SCHEMA` and the reading columns
+    (`value`, `battery_level`) must be stored as numbers, so a file with
+    e.g. string readings is rejected here instead of being unioned into the
+    batch scan.
+
+    Args:
+        filepath (str): Full path to the parquet file.
+
+    Returns:
+        Optional[str]: None if the schema is valid, otherwise a description
+                       of the mismatch.
+    """
+    schema = pq.read_schema(filepath)
+    actual_cols = {f.name.lower() for f in schema}
+    if actual_cols != set(EXPECTED_SCHEMA.keys()):
+        return f"expected columns {set(EXPECTED_SCHEMA.keys())}, got {actual_cols}"
+    for field in schema:
+        if field.name.lower() in NUMERIC_COLUMNS and not _is_numeric_type(field.type):
+            return f"expected a numeric {field.name}, got {field.type}"
+    return None
+
+
+def _is_numeric_type(dtype: pa.DataType) -> bool:
+    """
+    Check whether an Arrow type can hold a sensor reading.
+
+    Args:
+        dtype (pa.DataType): Column type from the parquet footer.
+
+    Returns:
+        bool: True for integer, floating point and decimal types, and for
+              the null type of an all-missing column.
+    """
+    return (
+        pa.types.is_integer(dtype) or pa.types.is_floating(dtype)
+        or pa.types.is_decimal(dtype) or pa.types.is_null(dtype)
+    )
+
+
+def _scan_files(filepaths: List[str]) -> pa.Table:
+    """
+    Read parquet files into one Arrow table with a single DuckDB scan.
+
+    DuckDB parallelizes row-group reads across all files internally and
+    fills `source_file` from its `filename` virtual column.
+
+    Args:
+        filepaths (List[str]): Full paths of the files to read.
+
+    Returns:
+        pa.Table: Rows of all files (columns unioned by name) plus `source_file`.
+    """
+    cur = _CON.cursor()
+    try:
+        result = cur.execute(
+            """
+            SELECT * EXCLUDE (filename), parse_filename(filename) AS source_file
+            FROM read_parquet(?, filename=true, union_by_name=true)
+            """,
+            [filepaths],
+        ).arrow(BATCH_SIZE)
+        # arrow() exists in every supported DuckDB release, but older ones
+        # return a Table and newer ones a RecordBatchReader
+        return result.read_all() if isinstance(result, pa.RecordBatchReader) else result
+    finally:
+        cur.close()
+
 
 def ingest_data(raw_dir: str) -> pd.DataFrame:
     """
     Ingest parquet files from a raw data directory.
 
     - Skips already processed files using checkpointing.
-    - Uses DuckDB to inspect schemas and run validation queries.
+    - Checks schemas from the parquet footer, then reads all new files with
+      a single parallel DuckDB scan.
+    - Derives per-file validation stats (row and NULL counts) from the scanned table.
     - Logs ingestion statistics (files read, records processed/failed).
     - Handles corrupt/unreadable files and schema mismatches.
     - Stores processed filenames in a checkpoint file.
@@ -25,90 +114,114 @@ def ingest_data(raw_dir: str) -> pd.DataFrame:
         pd.DataFrame: Combined DataFrame of all newly ingested files.
                       Empty DataFrame if no new files found.
     """    
-    checkpoint = load_checkpoint(CHECKPOINT_PATH)
+    checkpoint = load_checkpoint(utils.CHECKPOINT_PATH)
     processed_files = set(checkpoint.get("processed_files", []))
 
-    all_data = []
     files = sorted([f for f in os.listdir(raw_dir) if f.endswith(".parquet")])
 
     files_read = 0
     records_total = 0
     records_failed = 0
 
-    con = ddb.connect()
-
+    valid_files = []
     for file in files:
         filename = os.path.basename(file)
         filepath = os.path.join(raw_dir, file)
 
         if filename in processed_files:
-            logger.info(f"Skipping {filename} (already processed)")
+            logger.info("Skipping %s (already processed)", filename)
             continue
 
         try:
-            # Inspect schema using DuckDB
-            schema_df = con.execute(f"DESCRIBE SELECT * FROM parquet_scan('{filepath}')").fetchdf()
-            actual_cols = set(schema_df["column_name"].str.lower())
-            expected_cols = set(EXPECTED_SCHEMA.keys())
-
-            # Schema validation
-            if actual_cols != expected_cols:
-                logger.error(f"Schema mismatch in {filename}. Expected {expected_cols}, got {actual_cols}")
-                records_failed += 1
-                continue
-
-            # Run validation queries inside DuckDB
-            stats = con.execute(f"""
-                SELECT 
-                    COUNT(*) AS total,
-                    SUM(CASE WHEN value IS NULL THEN 1 ELSE 0 END) AS null_values,
-                    SUM(CASE WHEN battery_level IS NULL THEN 1 ELSE 0 END) AS null_battery
-                FROM parquet_scan('{filepath}')
-            """).fetchdf().iloc[0].to_dict()
-
-            logger.info(f"Validation for {filename}: {stats}")
-
-            # Load into pandas
-            df = pd.read_parquet(filepath)
-            df["source_file"] = filename
-
-            all_data.append(df)
-            records_total += len(df)
-            files_read += 1
-            processed_files.add(filename)
+            mismatch = _check_schema(filepath)
+        except READ_ERRORS as e:
+            logger.error("Failed to read %s: %s", filename, e)
+            records_failed += 1
+            continue
 
-        except Exception as e:
-            logger.error(f"Failed to read {filename}: {e}")
+        if mismatch is not None:
+            logger.error("Schema mismatch in %s: %s", filename, mismatch)
             records_failed += 1
+            continue
+
+        valid_files.append(filename)
 
-    con.close()
+    table = None
+    if valid_files:
+        try:
+            table = _scan_files([os.path.join(raw_dir, f) for f in valid_files])
+        except READ_ERRORS as e:
+            # A file can have a valid footer but unreadable pages; find it by
+            # reading files one at a time, then scan the readable ones together
+            # so their columns are unioned exactly as in the batch read
+            logger.warning("Batch read failed (%s); retrying files individually", e)
+            for filename in list(valid_files):
+                try:
+                    _scan_files([os.path.join(raw_dir, filename)])
+                except READ_ERRORS as e:
+                    logger.error("Failed to read %s: %s", filename, e)
+                    records_failed += 1
+                    valid_files.remove(filename)
+            if valid_files:
+                table = _scan_files([os.path.join(raw_dir, f) for f in valid_files])
+
+    if table is not None:
+        cur = _CON.cursor()
+        cur.register("raw", table)
+        per_file = cur.execute("""
+            SELECT source_file,
+                   COUNT(*) AS total,
+                   COUNT(*) - COUNT(value) AS null_values,
+                   COUNT(*) - COUNT(battery_level) AS null_battery
+            FROM raw
+            GROUP BY source_file
+        """).fetchall()
+        cur.close()
+        stats_by_file = {f: {"total": t, "null_values": nv, "null_battery": nb} for f, t, nv, nb in per_file}
+
+        for filename in valid_files:
+            stats = stats_by_file.get(filename, {"total": 0, "null_values": 0, "null_battery": 0})
+            logger.info("Validation for %s: %s", filename, stats)
+            records_total += stats["total"]
+            files_read += 1
+            processed_files.add(filename)
 
-    if all_data:
-        result = pd.concat(all_data, ignore_index=True)
+        # Sensor readings fit comfortably in float32; halving them cuts memory and
+        # bandwidth for every downstream transform and the processed output
+        for col in ("value", "battery_level"):
+            i = table.schema.get_field_index(col)
+            if pa.types.is_floating(table.schema.field(i).type) or pa.types.is_integer(table.schema.field(i).type):
+                table = table.set_column(i, col, table.column(i).cast(pa.float32()))
+
+        # Low-cardinality keys become pandas categoricals (int codes) straight
+        # from Arrow, so later groupbys and DuckDB scans work on codes
+        result = table.to_pandas(
+            categories=["sensor_id", "reading_type"], split_blocks=True, self_destruct=True
+        )
+        del table
     else:
         result = pd.DataFrame()
 
-    save_checkpoint({"processed_files": list(processed_files)}, CHECKPOINT_PATH)
+    save_checkpoint({"processed_files": list(processed_files)}, utils.CHECKPOINT_PATH)
 
     # Summary with DuckDB SQL aggregation
     if not result.empty:
-        con = ddb.connect()
-        con.register("df", result)
-        summary = con.execute("""
+        cur = _CON.cursor()
+        cur.register("df", result)
+        summary = cur.execute("""
             SELECT COUNT(DISTINCT source_file) AS files,
                    COUNT(*) AS records,
                    SUM(CASE WHEN value IS NULL OR battery_level IS NULL THEN 1 ELSE 0 END) AS invalid_rows
             FROM df
         """).fetchdf().iloc[0].to_dict()
-        con.close()
+        cur.close()
     else:
         summary = {"files": 0, "records": 0, "invalid_rows": 0}
 
     logger.info(
-        f"Ingestion summary: {{'files_read': {files_read}, "
-        f"'records_total': {records_total}, "
-        f"'records_failed': {records_failed}, "
-        f"'duckdb_summary': {summary}}}"
+        "Ingestion summary: {'files_read': %s, 'records_total': %s, "
+        "'records_failed': %s, 'duckdb_summary': %s}",
+        files_read, records_total, records_failed, summary,
     )
     
     return result
\ No newline at end of file
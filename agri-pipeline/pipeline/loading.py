@@ -1,19 +1,30 @@
 from __future__ import annotations
 import os
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
 from .utils import get_logger
 
 logger = get_logger("ingestion")
 
+# Permissions for processed output: writable by everyone, so host users can
+# replace partitions written by the container's root user
+FILE_MODE = 0o666
+DIR_MODE = 0o777
+
 def store_data(df: pd.DataFrame, processed_dir: str, partition_by_sensor: bool=True) -> None:
     """
     Save processed sensor data into partitioned Parquet files.
 
-    - Groups data by `date` and `sensor_id`.
-    - Creates directory structure under `processed_dir`:
-        <date>(Processed)/[sensor_id=<id>/]<reading_type>.parquet
+    - Writes the whole table with a single `pyarrow.dataset.write_dataset` call.
+    - Creates a Hive-style directory structure under `processed_dir`:
+        date=<date>/[sensor_id=<id>/]reading_type=<reading_type>/part-0.parquet
+    - Partition keys are stored only in the directory names, not in the files;
+      read the dataset root (e.g. `pd.read_parquet(processed_dir)`) to get them
+      back as columns. Other column types, incl. tz-aware timestamps, are kept.
     - Optionally partitions by sensor (default: True).
     - Uses Snappy compression.
+    - Makes files (FILE_MODE) and partition directories (DIR_MODE) world-writable.
 
     Args:
         df (pd.DataFrame): Transformed dataset with `date`, `sensor_id`, and `reading_type`.
@@ -26,13 +37,30 @@ def store_data(df: pd.DataFrame, processed_dir: str, partition_by_sensor: bool=T
     """
     if df is None or len(df)==0:
         return
-    for (date, sensor_id), g in df.groupby(["date","sensor_id"]):
-        base = os.path.join(processed_dir, f"{date}(Processed)")
-        if partition_by_sensor:
-            base = os.path.join(base, f"sensor_id={sensor_id}")
-        os.makedirs(base, exist_ok=True)
-        os.chmod(base, 0o777)
-        for rt, gg in g.groupby("reading_type"):
-            out = os.path.join(base, f"{rt}.parquet")
-            gg.to_parquet(out, index=False, compression="snappy")
-            os.chmod(out, 0o666) 
\ No newline at end of file
+    keys = ["date", "sensor_id", "reading_type"] if partition_by_sensor else ["date", "reading_type"]
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    written = []
+    ds.write_dataset(
+        table,
+        processed_dir,
+        format="parquet",
+        partitioning=ds.partitioning(table.select(keys).schema, flavor="hive"),
+        basename_template="part-{i}.parquet",
+        file_options=ds.ParquetFileFormat().make_write_options(compression="snappy"),
+        existing_data_behavior="overwrite_or_ignore",
+        file_visitor=lambda f: written.append(f.path),
+    )
+
+    # Modes are set explicitly on the written paths (each partition directory
+    # once) rather than via the process-wide umask
+    root = os.path.abspath(processed_dir)
+    dirs = set()
+    for path in written:
+        os.chmod(path, FILE_MODE)
+        parent = os.path.dirname(os.path.abspath(path))
+        while parent != root and parent not in dirs:
+            dirs.add(parent)
+            parent = os.path.dirname(parent)
+    for d in dirs:
+        os.chmod(d, DIR_MODE)
@@ -1,6 +1,8 @@
 from __future__ import annotations
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
 from datetime import timedelta
 import pytz
 from .utils import CALIBRATION, EXPECTED_RANGES
@@ -11,77 +13,96 @@ logger = get_logger("transform")
 
 
 IST = pytz.timezone("Asia/Kolkata")
+# IST has no DST, so Arrow kernels can use the fixed offset without a tz database
+IST_OFFSET = "+05:30"
 
-
-def _apply_calibration(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Apply calibration factors to sensor values.
-
-    Uses the `CALIBRATION` mapping to adjust raw sensor values with a 
-    multiplier and offset per `reading_type`.
-
-    Args:
-        df (pd.DataFrame): Input DataFrame with `reading_type` and `value`.
-
-    Returns:
-        pd.DataFrame: DataFrame with new column `value_calibrated`.
-    """    
-    def calibrate(row):
-        params = CALIBRATION.get(row["reading_type"], {"multiplier":1.0, "offset":0.0})
-        return row["value"] * params["multiplier"] + params["offset"]
-    df["value_calibrated"] = df.apply(calibrate, axis=1)
-    return df
+# Fixed reading_type categories: every known type keeps the same code across
+# batches, so per-type parameters live in lookup arrays built once at import.
+READING_TYPES = list(dict.fromkeys([*CALIBRATION, *EXPECTED_RANGES]))
+READING_TYPE_DTYPE = pd.CategoricalDtype(READING_TYPES)
+MULT_ARR = np.array([CALIBRATION.get(t, {"multiplier": 1.0})["multiplier"] for t in READING_TYPES])
+OFF_ARR = np.array([CALIBRATION.get(t, {"offset": 0.0})["offset"] for t in READING_TYPES])
+MIN_ARR = np.array([EXPECTED_RANGES.get(t, {"min": -np.inf})["min"] for t in READING_TYPES])
+MAX_ARR = np.array([EXPECTED_RANGES.get(t, {"max": np.inf})["max"] for t in READING_TYPES])
 
 
-def _flag_anomaly(df: pd.DataFrame) -> pd.DataFrame:
+def _as_reading_type(s: pd.Series) -> pd.Series:
     """
-    Flag anomalous readings outside expected ranges.
+    Convert `reading_type` to the fixed categorical dtype.
 
-    Compares calibrated values against `EXPECTED_RANGES` per `reading_type`.
+    Unknown reading types are appended after the known categories rather
+    than dropped, so known types always keep their `READING_TYPE_DTYPE` codes.
+    Series already in such a dtype are returned unchanged.
 
     Args:
-        df (pd.DataFrame): DataFrame with `value_calibrated`.
+        s (pd.Series): `reading_type` column.
 
     Returns:
-        pd.DataFrame: Adds boolean column `anomalous_reading`.
-    """    
-    def is_anom(row):
-        r = EXPECTED_RANGES.get(row["reading_type"])
-        if r is None or pd.isna(row["value_calibrated"]):
-            return False
-        return (row["value_calibrated"] < r["min"]) or (row["value_calibrated"] > r["max"])
-    df["anomalous_reading"] = df.apply(is_anom, axis=1)
-    return df
+        pd.Series: Categorical `reading_type` column.
+    """
+    if isinstance(s.dtype, pd.CategoricalDtype) and list(s.cat.categories[:len(READING_TYPES)]) == READING_TYPES:
+        return s
+    extra = sorted(set(s.dropna().unique()) - set(READING_TYPES))
+    return s.astype(pd.CategoricalDtype(READING_TYPES + extra))
 
 
-def _zscore_outliers(df: pd.DataFrame) -> pd.DataFrame:
+def _calibrate_and_score(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Detect and correct statistical outliers using z-score.
+    Calibrate values, correct z-score outliers and flag anomalies in one pass.
+
+    - Applies `CALIBRATION` multiplier/offset per `reading_type`.
+    - Computes z-scores within each `reading_type` and clips values outside
+      3 standard deviations from the mean.
+    - Flags calibrated values outside `EXPECTED_RANGES`.
 
-    - Computes z-scores within each `reading_type`.
-    - Clips values outside 3 standard deviations from the mean.
-    - Produces corrected values.
+    All per-type parameters are gathered from the module-level lookup arrays
+    indexed by the fixed `reading_type` category code.
 
     Args:
-        df (pd.DataFrame): DataFrame with `value_calibrated`.
+        df (pd.DataFrame): Input DataFrame with `reading_type` and `value`.
 
     Returns:
-        pd.DataFrame: Adds `zscore` and `value_corrected`.
+        pd.DataFrame: Adds `value_calibrated`, `zscore`, `value_corrected`
+                      and `anomalous_reading`.
     """
-    def zscore(s):
-        if s.std(ddof=0) == 0 or len(s) < 3:
-            return pd.Series([0]*len(s), index=s.index)
-        return (s - s.mean())/s.std(ddof=0)
-    df["zscore"] = df.groupby("reading_type")["value_calibrated"].transform(zscore)
-    def correct(group):
-        mean = group["value_calibrated"].mean()
-        std = group["value_calibrated"].std(ddof=0)
-        if std == 0 or np.isnan(std):
-            return group["value_calibrated"]
-        hi = mean + 3*std
-        lo = mean - 3*std
-        return group["value_calibrated"].clip(lower=lo, upper=hi)
-    df["value_corrected"] = df.groupby("reading_type", group_keys=False).apply(correct)
+    rt = _as_reading_type(df["reading_type"])
+    types = rt.cat.categories
+    codes = rt.cat.codes.to_numpy()
+
+    # float32 input (as produced by ingestion) stays float32 end to end
+    dtype = np.float32 if df["value"].dtype == np.float32 else np.float64
+
+    # Unknown types (appended categories) get the neutral defaults
+    extra = len(types) - len(READING_TYPES)
+    mult = np.concatenate([MULT_ARR, np.ones(extra)]).astype(dtype)
+    off = np.concatenate([OFF_ARR, np.zeros(extra)]).astype(dtype)
+    mins = np.concatenate([MIN_ARR, np.full(extra, -np.inf)]).astype(dtype)
+    maxs = np.concatenate([MAX_ARR, np.full(extra, np.inf)]).astype(dtype)
+
+    v = df["value"].to_numpy(dtype=dtype)
+    vc = v * mult[codes] + off[codes]
+
+    # Per-type stats, grouped on the integer codes
+    g = pd.Series(vc).groupby(codes)
+    stats = g.agg(["mean", "size"]).reindex(range(len(types)))
+    mean = stats["mean"].to_numpy(dtype=np.float64)
+    std = g.std(ddof=0).reindex(range(len(types))).to_numpy(dtype=np.float64)
+    size = stats["size"].fillna(0).to_numpy()
+
+    # Clip bounds are per reading_type; groups without a usable std are left unclipped
+    unusable = (std == 0) | np.isnan(std)
+    lo = np.where(unusable, -np.inf, mean - 3*std)
+    hi = np.where(unusable, np.inf, mean + 3*std)
+    # Constant or tiny groups get a zero z-score
+    flat = (std == 0) | (size < 3)
+    inv_std = np.where(flat, 0.0, 1.0 / np.where(std == 0, 1.0, std))
+    mean, lo, hi, inv_std = (a.astype(dtype) for a in (mean, lo, hi, inv_std))
+
+    df["value_calibrated"] = vc
+    df["zscore"] = (vc - mean[codes]) * inv_std[codes]
+    df["value_corrected"] = np.clip(vc, lo[codes], hi[codes])
+    # NaN compares False on both sides, so missing values are never flagged
+    df["anomalous_reading"] = (vc < mins[codes]) | (vc > maxs[codes])
     return df
 
 
@@ -101,12 +122,46 @@ def _timestamp_processing(df: pd.DataFrame) -> pd.DataFrame:
     """    
     ts = pd.to_datetime(df["timestamp"], utc=True, errors="coerce")
     df["timestamp_ist"] = ts.dt.tz_convert(IST)
-    df["timestamp_iso"] = df["timestamp_ist"].dt.strftime("%Y-%m-%dT%H:%M:%S%z")
-    df["date"] = df["timestamp_ist"].dt.date.astype(str)
-    df["hour"] = df["timestamp_ist"].dt.floor("H")
+    ts_ist = pc.cast(pa.array(ts), pa.timestamp("s", tz=IST_OFFSET), safe=False)
+    iso = pc.strftime(ts_ist, format="%Y-%m-%dT%H:%M:%S%z")
+    df["timestamp_iso"] = pd.Series(iso.to_pandas().to_numpy(), index=df.index)
+    # Unparseable timestamps keep the "NaT" label the old str cast produced
+    date = pc.fill_null(pc.strftime(ts_ist, format="%Y-%m-%d"), "NaT")
+    df["date"] = pd.Series(date.to_pandas().to_numpy(), index=df.index)
+    df["hour"] = df["timestamp_ist"].dt.floor("h")
     return df
 
 
+def _grouped_rolling_mean(values: np.ndarray, starts: np.ndarray, window: int) -> np.ndarray:
+    """
+    Trailing rolling mean over contiguous groups, skipping NaNs.
+
+    Equivalent to `groupby(...).rolling(window, min_periods=1).mean()` on
+    rows already sorted by group, computed from prefix sums in one pass.
+
+    Args:
+        values (np.ndarray): Values sorted by group.
+        starts (np.ndarray): Boolean mask marking the first row of each group.
+        window (int): Number of rows in the trailing window.
+
+    Returns:
+        np.ndarray: Rolling means (NaN where the window has no valid values).
+    """
+    n = len(values)
+    valid = ~np.isnan(values)
+    csum = np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0))))
+    ccnt = np.concatenate(([0], np.cumsum(valid)))
+
+    pos = np.arange(n)
+    group_start = np.maximum.accumulate(np.where(starts, pos, 0))
+    lo = np.maximum(pos - window + 1, group_start)
+
+    total = csum[pos + 1] - csum[lo]
+    count = ccnt[pos + 1] - ccnt[lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / count, np.nan)
+
+
 def _aggregations(df: pd.DataFrame) -> pd.DataFrame:
     """
     Compute daily and rolling averages.
@@ -120,33 +175,23 @@ def _aggregations(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         pd.DataFrame: Adds `daily_avg` and `rolling_7d`.
     """    
-    daily = (
-        df.groupby(["sensor_id", "reading_type", "date"])["value_corrected"]
-          .mean()
-          .rename("daily_avg")
-          .reset_index()
-    )
-    df = df.merge(daily, on=["sensor_id","reading_type","date"], how="left")
+    keys = ["sensor_id", "reading_type", "date"]
+    df["daily_avg"] = df.groupby(keys, observed=True)["value_corrected"].transform("mean")
 
+    # ISO date strings sort chronologically, so no datetime round-trip is needed
     daily_series = (
-        df.drop_duplicates(["sensor_id","reading_type","date"])
-          .sort_values(["sensor_id","reading_type","date"])
+        df.drop_duplicates(keys)
+          .sort_values(keys)
           .copy()
     )
-    daily_series["date"] = pd.to_datetime(daily_series["date"])
-
-    daily_series["rolling_7d"] = (
-        daily_series.groupby(["sensor_id", "reading_type"])["daily_avg"]
-        .transform(lambda x: x.rolling(7, min_periods=1).mean())
-    )
-
-    daily_series["date"] = daily_series["date"].dt.date.astype(str)
+    gid = daily_series.groupby(["sensor_id", "reading_type"], sort=False, observed=True).ngroup().to_numpy()
+    starts = np.r_[True, gid[1:] != gid[:-1]]
+    daily_series["rolling_7d"] = _grouped_rolling_mean(daily_series["daily_avg"].to_numpy(dtype=np.float64), starts, 7)
 
-    df = df.merge(
-        daily_series[["sensor_id","reading_type","date","rolling_7d"]],
-        on=["sensor_id","reading_type","date"], how="left"
-    )
-    return df
+    # Broadcast back with a MultiIndex lookup rather than a second merge
+    rolling = daily_series.set_index(keys)["rolling_7d"]
+    df["rolling_7d"] = rolling.reindex(pd.MultiIndex.from_frame(df[keys])).to_numpy()
+    return df.reset_index(drop=True)
 
 def transform_data(raw_df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -171,12 +216,11 @@ def transform_data(raw_df: pd.DataFrame) -> pd.DataFrame:
     df = raw_df.copy()
     df = df.drop_duplicates(subset=["sensor_id","timestamp","reading_type"])
     df = df.dropna(subset=["sensor_id","timestamp","reading_type","value"])
+    df["reading_type"] = _as_reading_type(df["reading_type"])
     if "battery_level" in df.columns:
-        if df["battery_level"].isna().any():
-            df["battery_level"] = df["battery_level"].fillna(method="ffill").fillna(method="bfill").fillna(df["battery_level"].mean())
-    df = _apply_calibration(df)
-    df = _zscore_outliers(df)
-    df = _flag_anomaly(df)
+        battery = df["battery_level"].ffill().bfill()
+        df["battery_level"] = battery.fillna(battery.mean())
+    df = _calibrate_and_score(df)
     df = _timestamp_processing(df)
     df = _aggregations(df)
     return df
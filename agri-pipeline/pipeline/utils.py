@@ -1,6 +1,11 @@
 import os, json, logging
 from typing import Dict, Any
 
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is used otherwise
+    orjson = None
+
 EXPECTED_SCHEMA = {
     "sensor_id": "string",
     "timestamp": "string",
@@ -65,6 +70,8 @@ def load_checkpoint(path: str = CHECKPOINT_PATH) -> Dict[str, Any]:
     """
     Load pipeline checkpoint state from a JSON file.
 
+    Uses `orjson` when it is installed, falling back to the stdlib `json`.
+
     - If the checkpoint file exists, it is loaded and returned.
     - If no file is found, a default state with an empty list of processed files is returned.
 
@@ -84,6 +91,9 @@ def load_checkpoint(path: str = CHECKPOINT_PATH) -> Dict[str, Any]:
         True
     """    
     if os.path.exists(path):
+        if orjson is not None:
+            with open(path, "rb") as f:
+                return orjson.loads(f.read())
         with open(path, "r") as f:
             return json.load(f)
     return {"processed_files": []}
@@ -93,7 +103,8 @@ def save_checkpoint(state: Dict[str, Any], path: str = CHECKPOINT_PATH) -> None:
     Save pipeline checkpoint state to a JSON file.
 
     - Creates parent directories if they don’t exist.
-    - Serializes the state dictionary into JSON with indentation.
+    - Serializes the state dictionary into JSON with indentation
+      (via `orjson` when installed, otherwise stdlib `json`).
 
     Args:
         state (Dict[str, Any]): Checkpoint state to save. 
@@ -112,6 +123,10 @@ def save_checkpoint(state: Dict[str, Any], path: str = CHECKPOINT_PATH) -> None:
         # Creates/updates checkpoint file on disk
     """
     os.makedirs(os.path.dirname(path), exist_ok=True)
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(state, option=orjson.OPT_INDENT_2))
+        return
     with open(path, "w") as f:
         json.dump(state, f, indent=2)
     # os.chmod(path, 0o666)
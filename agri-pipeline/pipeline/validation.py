@@ -1,121 +1,309 @@
 import duckdb
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+from .utils import get_logger
 
-def validate_data(df: pd.DataFrame, report_path: str):
-    # Nothing to validate → return empty DataFrame
-    if df is None or df.empty:
-        print("⚠️ No data to validate. Skipping validation.")
-        return pd.DataFrame()
+logger = get_logger("validation")
 
-    con = duckdb.connect()
-    con.register("df", df)
 
-    # --- Type checks ---
-    # 1) value must be numeric
-    # 2) timestamp column storage type must be VARCHAR or TIMESTAMP (incl. TIMESTAMPTZ)
-    # 3) every row must be parsable as TIMESTAMP (NULL or unparseable counted as invalid)
-    type_checks = con.execute("""
-        SELECT
-          SUM(CASE
-                WHEN typeof(value) IN ('DOUBLE','FLOAT','DECIMAL','INTEGER','HUGEINT')
-                THEN 0 ELSE 1
-              END) AS invalid_value_type,
-          SUM(CASE
-                WHEN typeof(timestamp) IN ('VARCHAR','TIMESTAMP','TIMESTAMPTZ')
-                THEN 0 ELSE 1
-              END) AS invalid_timestamp_storage_type,
-          SUM(CASE
-                WHEN timestamp IS NULL OR try_cast(timestamp AS TIMESTAMP) IS NULL
-                THEN 1 ELSE 0
-              END) AS unparsable_timestamp_rows
-        FROM df
-    """).fetchdf()
+# Set bits per byte value, for counting hours in the packed bitset
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
 
-    # --- Range checks (quick profile of observed ranges) ---
-    range_checks = con.execute("""
-        SELECT reading_type,
-               MIN(value) AS min_value,
-               MAX(value) AS max_value
-        FROM df
-        GROUP BY reading_type
-    """).fetchdf()
 
-    # --- Missing values per reading_type ---
-    missing = con.execute("""
-        SELECT reading_type,
-               COUNT(*) AS total,
-               SUM(CASE WHEN value IS NULL THEN 1 ELSE 0 END) AS missing_values
-        FROM df
-        GROUP BY reading_type
-    """).fetchdf()
-    # --- Gaps in hourly data (robust to random minutes) ---
-    gaps = con.execute("""
-        WITH bounds AS (
-          SELECT
-            sensor_id,
-            reading_type,
-            date_trunc('hour', MIN(try_cast(timestamp AS TIMESTAMP))) AS min_h,
-            date_trunc('hour', MAX(try_cast(timestamp AS TIMESTAMP))) AS max_h
-          FROM df
-          GROUP BY sensor_id, reading_type
-        ),
-        expected AS (
-          SELECT
-            b.sensor_id,
-            b.reading_type,
-            gs.ts AS hour
-          FROM bounds b
-          CROSS JOIN generate_series(b.min_h, b.max_h, INTERVAL 1 HOUR) AS gs(ts)
-        ),
-        actual AS (
-          SELECT
-            sensor_id,
-            reading_type,
-            date_trunc('hour', try_cast(timestamp AS TIMESTAMP)) AS hour
-          FROM df
-          WHERE try_cast(timestamp AS TIMESTAMP) IS NOT NULL
-          GROUP BY 1,2,3
-        )
-        SELECT
-          e.sensor_id,
-          e.reading_type,
-          COUNT(*) AS expected_hours,
-          COUNT(a.hour) AS actual_hours,
-          (COUNT(*) - COUNT(a.hour)) AS missing_hours
-        FROM expected e
-        LEFT JOIN actual a
-          ON e.sensor_id = a.sensor_id
-         AND e.reading_type = a.reading_type
-         AND e.hour = a.hour
-        GROUP BY e.sensor_id, e.reading_type
-        ORDER BY e.sensor_id, e.reading_type
-    """).fetchdf()
-
-
-    # --- Simple profile (per type) ---
-    profile = con.execute("""
+def _distinct_hours_sorted(gid: np.ndarray, hours: np.ndarray) -> np.ndarray:
+    """
+    Count distinct hours per group with one sort of all rows.
+
+    Args:
+        gid (np.ndarray): Dense group id (0..n_groups-1) per row.
+        hours (np.ndarray): Hour number per row.
+
+    Returns:
+        np.ndarray: Distinct hour count per group id.
+    """
+    order = np.lexsort((hours, gid))
+    g = gid[order]
+    h = hours[order]
+    starts = np.r_[True, g[1:] != g[:-1]]
+    new_hour = starts | np.r_[True, h[1:] != h[:-1]]
+    return np.add.reduceat(new_hour.astype(np.int64), np.flatnonzero(starts))
+
+
+def _hourly_gaps(sensor_id: np.ndarray, reading_type: np.ndarray, hours: np.ndarray) -> pd.DataFrame:
+    """
+    Count expected, observed and missing hours per (sensor_id, reading_type).
+
+    Expected hours span each group's first to last observed hour; observed
+    hours are the distinct hour numbers. They are counted without a sort by
+    setting one bit per observed hour in a packed bitset covering each
+    group's span and summing the set bits per group. The bitset grows with
+    the spans rather than the rows, so when it would be larger than one byte
+    per row (e.g. a stray far-off timestamp) the sort-based count is used.
+
+    Args:
+        sensor_id (np.ndarray): Sensor id per row.
+        reading_type (np.ndarray): Reading type per row.
+        hours (np.ndarray): Hour number per row (int64 hours since epoch).
+
+    Returns:
+        pd.DataFrame: `sensor_id`, `reading_type`, `expected_hours`,
+                      `actual_hours`, `missing_hours`, sorted by group.
+    """
+    columns = ["sensor_id", "reading_type", "expected_hours", "actual_hours", "missing_hours"]
+    if len(hours) == 0:
+        return pd.DataFrame(columns=columns)
+
+    gid, groups = pd.factorize(pd.MultiIndex.from_arrays([sensor_id, reading_type]), sort=True)
+    first = np.full(len(groups), np.iinfo(np.int64).max)
+    last = np.full(len(groups), np.iinfo(np.int64).min)
+    np.minimum.at(first, gid, hours)
+    np.maximum.at(last, gid, hours)
+    expected = last - first + 1
+
+    # Group g owns bytes [base[g], base[g] + span_bytes[g]) of the bitset
+    span_bytes = (expected + 7) // 8
+    if span_bytes.sum() <= len(hours):
+        base = np.r_[0, np.cumsum(span_bytes[:-1])]
+        bits = np.zeros(int(span_bytes.sum()), dtype=np.uint8)
+        offset = hours - first[gid]
+        np.bitwise_or.at(bits, base[gid] + (offset >> 3), np.left_shift(1, offset & 7).astype(np.uint8))
+        actual = np.add.reduceat(_POPCOUNT[bits], base)
+    else:
+        actual = _distinct_hours_sorted(gid, hours)
+
+    return pd.DataFrame({
+        "sensor_id": groups.get_level_values(0),
+        "reading_type": groups.get_level_values(1),
+        "expected_hours": expected,
+        "actual_hours": actual,
+        "missing_hours": expected - actual,
+    }, columns=columns)
+
+
+# Below this many rows the fixed cost of a DuckDB connection and query plan
+# outweighs the scan itself, so the checks run in pandas/NumPy instead
+SMALL_FRAME_ROWS = 10_000
+
+PER_TYPE_COLUMNS = [
+    "reading_type", "total", "null_values", "min_value", "max_value",
+    "invalid_value_type", "invalid_timestamp_storage_type", "unparsable_timestamp_rows",
+]
+
+# Check counts reported as floats, as DuckDB's SUM() returns them
+SUM_COLUMNS = ["null_values", "invalid_value_type", "invalid_timestamp_storage_type", "unparsable_timestamp_rows"]
+
+
+def _is_numeric(s: pd.Series) -> bool:
+    """
+    Check whether a column's storage type is numeric (booleans excluded).
+
+    Args:
+        s (pd.Series): Column to check.
+
+    Returns:
+        bool: True for integer, float and decimal columns.
+    """
+    return pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s)
+
+
+def _per_type_duckdb(df: pd.DataFrame, con: duckdb.DuckDBPyConnection) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Compute the per-reading_type checks and hourly gaps with DuckDB.
+
+    Each query runs concurrently on its own cursor of `con`, so the
+    registered frame is dropped when the cursors close while the connection
+    itself stays open.
+
+    Args:
+        df (pd.DataFrame): Transformed data with a native datetime `timestamp`.
+        con (duckdb.DuckDBPyConnection): Connection to run the queries on.
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: Per-type checks (`PER_TYPE_COLUMNS`
+                                           without the storage-type columns,
+                                           ordered by reading_type) and the
+                                           gaps section (see `_hourly_gaps`).
+    """
+    # Arrow is DuckDB's native scan format; fall back to the pandas scan for
+    # object columns Arrow cannot type (e.g. mixed numbers and strings)
+    try:
+        source = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        source = df
+
+    def run(sql: str) -> pd.DataFrame:
+        # Registrations are per cursor, so each query registers the (zero-copy)
+        # source on its own cursor
+        cur = con.cursor()
+        try:
+            cur.register("df", source)
+            return cur.execute(sql).fetchdf()
+        finally:
+            cur.close()
+
+    # --- Single pass per reading_type ---
+    # Range checks, missing values, profile and the type checks all come from
+    # one GROUP BY scan; the sections below are projections of its result.
+    # Storage-type checks are column-level and come from the dtypes in
+    # validate_data; the only row-level type check is the timestamp one:
+    # every row must have a timestamp (NULL / unparseable counted as invalid)
+    per_type_sql = """
         SELECT reading_type,
                COUNT(*) AS total,
-               SUM(CASE WHEN value IS NULL THEN 1 ELSE 0 END) AS null_values
+               SUM(CASE WHEN value IS NULL THEN 1 ELSE 0 END) AS null_values,
+               MIN(value) AS min_value,
+               MAX(value) AS max_value,
+               SUM(CASE WHEN timestamp IS NULL THEN 1 ELSE 0 END) AS unparsable_timestamp_rows
         FROM df
         GROUP BY reading_type
         ORDER BY reading_type
-    """).fetchdf()
+    """
+    # Hourly gaps in one aggregation: hour numbers come from the timestamp
+    # truncated to the hour (robust to random minutes; DuckDB's integer
+    # divide rounds toward zero, so dividing raw epoch_ms would merge the
+    # hours either side of 1970-01-01) and COUNT(DISTINCT)
+    # dedups them in the same hash pass, so only one row per group comes back
+    gaps_sql = """
+        SELECT sensor_id, reading_type,
+               MAX(hour) - MIN(hour) + 1 AS expected_hours,
+               COUNT(DISTINCT hour) AS actual_hours,
+               MAX(hour) - MIN(hour) + 1 - COUNT(DISTINCT hour) AS missing_hours
+        FROM (
+            SELECT sensor_id, reading_type, epoch_ms(date_trunc('hour', timestamp)) // 3600000 AS hour
+            FROM df
+            WHERE timestamp IS NOT NULL
+        )
+        GROUP BY sensor_id, reading_type
+        ORDER BY sensor_id, reading_type
+    """
+
+    # The queries are independent, so they run concurrently on their own cursors
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        per_type_future = ex.submit(run, per_type_sql)
+        gaps_future = ex.submit(run, gaps_sql)
+        per_type = per_type_future.result()
+        gaps = gaps_future.result()
+    return per_type, gaps
+
+
+def _per_type_pandas(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Compute the same per-reading_type checks and hourly gaps as
+    `_per_type_duckdb` directly in pandas/NumPy, for small frames.
+
+    Args:
+        df (pd.DataFrame): Transformed data with a native datetime `timestamp`.
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: Per-type checks (`PER_TYPE_COLUMNS`
+                                           without the storage-type columns,
+                                           ordered by reading_type) and the
+                                           gaps section (see `_hourly_gaps`).
+    """
+    value = df["value"]
+    # Non-numeric values are ranged as text, like DuckDB's VARCHAR MIN/MAX
+    if not _is_numeric(value):
+        value = value.astype("string")
+
+    ts = df["timestamp"].to_numpy()
+    valid = ~np.isnat(ts)
+    checks = pd.DataFrame({
+        "value": value,
+        "is_null": value.isna().to_numpy(),
+        "unparsable": ~valid,
+    })
+    per_type = (
+        checks.groupby(df["reading_type"].astype(object).to_numpy(), dropna=False)
+        .agg(
+            total=("value", "size"),
+            null_values=("is_null", "sum"),
+            min_value=("value", "min"),
+            max_value=("value", "max"),
+            unparsable_timestamp_rows=("unparsable", "sum"),
+        )
+        .rename_axis("reading_type")
+        .reset_index()
+    )
 
-    # Save sections into one CSV with headers
-    report = {
-        "type_checks": type_checks,
-        "range_checks": range_checks,
-        "missing": missing,
-        "gaps": gaps,
-        "profile": profile
-    }
+    gaps = _hourly_gaps(
+        df["sensor_id"].to_numpy()[valid],
+        df["reading_type"].to_numpy()[valid],
+        ts[valid].astype("datetime64[h]").astype(np.int64),
+    )
+    return per_type, gaps
 
+
+def _write_section(f, section: str, data: pd.DataFrame) -> None:
+    """
+    Append one titled CSV section to the open report file.
+
+    Args:
+        f: Report file opened in text mode.
+        section (str): Section title, written as `## <section>`.
+        data (pd.DataFrame): Section rows.
+    """
+    f.write(f"## {section}\n")
+    data.to_csv(f, index=False)
+    f.write("\n\n")
+
+
+def validate_data(df: pd.DataFrame, report_path: str, con: Optional[duckdb.DuckDBPyConnection] = None):
+    # Nothing to validate → return empty DataFrame
+    if df is None or df.empty:
+        logger.warning("No data to validate. Skipping validation.")
+        return pd.DataFrame()
+
+    # Storage-type checks read the column dtypes once instead of scanning rows:
+    # 1) value must be numeric
+    # 2) timestamp must be stored as strings or datetimes (incl. tz-aware)
+    # After this the timestamp column is parsed once into a native naive-UTC
+    # datetime64, so neither path below has to cast or parse strings
+    value_ok = _is_numeric(df["value"])
+    timestamp = df["timestamp"]
+    timestamp_ok = pd.api.types.is_string_dtype(timestamp) or pd.api.types.is_datetime64_any_dtype(timestamp)
+    if not pd.api.types.is_datetime64_dtype(timestamp):
+        timestamp = pd.to_datetime(timestamp, utc=True, errors="coerce", format="ISO8601").dt.tz_localize(None)
+        df = df.assign(timestamp=timestamp)
+
+    if len(df) < SMALL_FRAME_ROWS:
+        per_type, gaps = _per_type_pandas(df)
+    elif con is not None:
+        per_type, gaps = _per_type_duckdb(df, con)
+    else:
+        with duckdb.connect() as own:
+            per_type, gaps = _per_type_duckdb(df, own)
+    per_type["invalid_value_type"] = 0 if value_ok else per_type["total"]
+    per_type["invalid_timestamp_storage_type"] = 0 if timestamp_ok else per_type["total"]
+    # The report has always printed the check counts as DuckDB SUM() doubles
+    # (e.g. 0.0), whichever path computed them
+    per_type = per_type[PER_TYPE_COLUMNS].astype({column: "float64" for column in SUM_COLUMNS})
+
+    # Each section is written as soon as it is built, so only one projection
+    # is alive at a time
     with open(report_path, "w") as f:
-        for section, data in report.items():
-            f.write(f"## {section}\n")
-            data.to_csv(f, index=False)
-            f.write("\n\n")
+        type_checks = (
+            per_type[["invalid_value_type", "invalid_timestamp_storage_type", "unparsable_timestamp_rows"]]
+            .sum()
+            .to_frame()
+            .T
+        )
+        _write_section(f, "type_checks", type_checks)
+        del type_checks
+
+        _write_section(f, "range_checks", per_type[["reading_type", "min_value", "max_value"]])
+        _write_section(
+            f, "missing",
+            per_type[["reading_type", "total", "null_values"]].rename(columns={"null_values": "missing_values"}),
+        )
+
+        # --- Gaps in hourly data (robust to random minutes) ---
+        _write_section(f, "gaps", gaps)
+        del gaps
+
+        # --- Simple profile (per type) ---
+        _write_section(f, "profile", per_type[["reading_type", "total", "null_values"]])
 
-    con.close()
     print(f"✅ Data quality report saved at {report_path}")
@@ -1,6 +1,9 @@
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 
 OUTPUT_DIR = "data/raw"
@@ -17,59 +20,76 @@ READING_TYPES = {
     "light_intensity": {"min": 100, "max": 1000},
 }
 
-np.random.seed(0)
+# Erroneous values injected per reading type
+ERROR_VALUES = {
+    "temperature": [-50, 120],
+    "humidity": [-10, 150],
+    "soil_moisture": [-5, 200],
+    "light_intensity": [-100, 5000],
+    "battery_level": [-20, 150],
+}
+
+def generate_day_data(date: datetime, rng: np.random.Generator):
+    # Columns are preallocated (sensor -> reading type -> hour row order) and
+    # filled per reading type, then wrapped in a single DataFrame
+    types = list(READING_TYPES)
+    n = NUM_SENSORS * 24
+    sensor_id = np.char.add("sensor_", np.repeat(np.arange(1, NUM_SENSORS + 1), 24 * len(types)).astype(str))
+    reading_type = np.tile(np.repeat(types, 24), NUM_SENSORS)
+    hours = np.tile(np.arange(24), NUM_SENSORS * len(types))
+    minutes = np.empty(len(hours), dtype=np.int64)
+    value = np.empty(len(hours))
+    battery_level = np.empty(len(hours))
 
-def generate_day_data(date: datetime):
-    records = []
-    for sensor in range(1, NUM_SENSORS + 1):
-        for hour in range(24):
-            for reading_type, bounds in READING_TYPES.items():
-                timestamp = date + timedelta(hours=hour, minutes=np.random.randint(0, 60))
+    for reading_type_name, bounds in READING_TYPES.items():
+        rows = reading_type == reading_type_name
+        minutes[rows] = rng.integers(0, 60, n)
 
-                value = np.random.uniform(bounds["min"], bounds["max"])
-                value = round(value, 2)
+        values = rng.uniform(bounds["min"], bounds["max"], n).round(2)
+        missing = rng.random(n) < 0.05
+        # Introduce occasional erroneous values
+        erroneous = ~missing & (rng.random(n) < 0.05)
+        values[erroneous] = rng.choice(ERROR_VALUES[reading_type_name], erroneous.sum())
+        values[missing] = np.nan
+        value[rows] = values
 
-                if np.random.rand() < 0.05:
-                    value = None
+        battery = rng.uniform(20, 100, n).round(2)
+        battery[rng.random(n) < 0.05] = np.nan
+        battery_level[rows] = battery
 
-                # Introduce occasional erroneous values
-                elif np.random.rand() < 0.05:
-                    if reading_type == "temperature":
-                        value = np.random.choice([-50, 120])  
-                    elif reading_type == "humidity":
-                        value = np.random.choice([-10, 150])  
-                    elif reading_type == "soil_moisture":
-                        value = np.random.choice([-5, 200])  
-                    elif reading_type == "light_intensity":
-                        value = np.random.choice([-100, 5000])  
-                    elif reading_type == "battery_level":
-                        value = np.random.choice([-20, 150]) 
-                
-                
-                battery_level = np.random.uniform(20, 100)
-                battery_level = round(battery_level, 2)
-                
-                if np.random.rand() < 0.05:
-                    battery_level = None 
+    return pd.DataFrame({
+        "sensor_id": sensor_id,
+        "timestamp": pd.Timestamp(date) + pd.to_timedelta(hours * 3600 + minutes * 60, unit="s"),
+        "reading_type": reading_type,
+        "value": value,
+        "battery_level": battery_level,
+    })
 
-                records.append({
-                    "sensor_id": f"sensor_{sensor}",
-                    "timestamp": timestamp,
-                    "reading_type": reading_type,
-                    "value": value,
-                    "battery_level": battery_level
-                })
-    return pd.DataFrame(records)
+def generate_and_write_day(i: int):
+    # Each day gets its own seeded RNG stream, so output does not depend on
+    # which worker process handles it
+    date = START_DATE + timedelta(days=i)
+    df = generate_day_data(date, np.random.default_rng(i))
+    filename = os.path.join(OUTPUT_DIR, f"{date.strftime('%Y-%m-%d')}.parquet")
+    pq.write_table(
+        pa.Table.from_pandas(df, preserve_index=False),
+        filename,
+        compression="zstd",
+        compression_level=3,
+        use_dictionary=["sensor_id", "reading_type"],
+        row_group_size=65536,
+        data_page_size=1 << 20,
+    )
+    return filename, len(df)
 
 def main():
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-    for i in range(DAYS):
-        date = START_DATE + timedelta(days=i)
-        df = generate_day_data(date)
-        filename = os.path.join(OUTPUT_DIR, f"{date.strftime('%Y-%m-%d')}.parquet")
-        df.to_parquet(filename, index=False)
-        print(f"Generated {filename} with {len(df)} rows")
+    # Days are independent, so each worker generates and writes its own day
+    # file; only (filename, rows) comes back to the parent
+    with ProcessPoolExecutor() as ex:
+        for filename, rows in ex.map(generate_and_write_day, range(DAYS)):
+            print(f"Generated {filename} with {rows} rows")
 
 if __name__ == "__main__":
     main()
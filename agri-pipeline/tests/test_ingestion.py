@@ -85,3 +85,68 @@ def test_ingestion_empty_dir(tmp_path, caplog, monkeypatch):
     out = ingest_data(str(raw))
     # assert out.empty
     assert "files_read': 0" in caplog.text
+
+
+@pytest.mark.parametrize("string_file", ["2025-06-04.parquet", "2025-06-06.parquet"])
+def test_ingestion_rejects_non_numeric_readings(string_file, tmp_path, caplog, monkeypatch):
+    raw = tmp_path / "raw"; raw.mkdir()
+    for name in ["2025-06-04.parquet", "2025-06-05.parquet", "2025-06-06.parquet"]:
+        df = _write_parquet(str(raw / name), rows=4)
+        if name == string_file:
+            # same column names, but `value` stored as strings
+            df.assign(value=df["value"].astype(str)).to_parquet(raw / name, index=False)
+
+    ckpt = tmp_path / ".checkpoint.json"
+    monkeypatch.setattr("pipeline.utils.CHECKPOINT_PATH", str(ckpt))
+
+    out = ingest_data(str(raw))
+    # the string file is rejected from its footer whatever its position,
+    # and the other files keep float32 readings
+    kept = sorted({"2025-06-04.parquet", "2025-06-05.parquet", "2025-06-06.parquet"} - {string_file})
+    assert sorted(out["source_file"].unique()) == kept
+    assert len(out) == 8
+    assert out["value"].dtype == np.float32
+    assert f"Schema mismatch in {string_file}" in caplog.text
+    assert "'records_failed': 1" in caplog.text
+    assert sorted(json.loads(ckpt.read_text())["processed_files"]) == kept
+
+
+def test_ingestion_isolates_damaged_pages(tmp_path, caplog, monkeypatch):
+    raw = tmp_path / "raw"; raw.mkdir()
+    _write_parquet(str(raw / "2025-06-05.parquet"), rows=4)
+    _write_parquet(str(raw / "2025-06-06.parquet"), rows=3)
+    # valid footer over unreadable pages fails the batch read
+    damaged = raw / "2025-06-07.parquet"
+    _write_parquet(str(damaged), rows=50)
+    data = bytearray(damaged.read_bytes())
+    data[4:200] = b"\xff" * 196
+    damaged.write_bytes(bytes(data))
+
+    ckpt = tmp_path / ".checkpoint.json"
+    monkeypatch.setattr("pipeline.utils.CHECKPOINT_PATH", str(ckpt))
+
+    out = ingest_data(str(raw))
+    assert sorted(out["source_file"].unique()) == ["2025-06-05.parquet", "2025-06-06.parquet"]
+    assert len(out) == 7
+    assert "Failed to read 2025-06-07.parquet" in caplog.text
+    assert "'records_failed': 1" in caplog.text
+    assert sorted(json.loads(ckpt.read_text())["processed_files"]) == ["2025-06-05.parquet", "2025-06-06.parquet"]
+
+
+def test_ingestion_output_dtypes(tmp_path, monkeypatch):
+    raw = tmp_path / "raw"; raw.mkdir()
+    df = _write_parquet(str(raw / "2025-06-08.parquet"), rows=6)
+
+    ckpt = tmp_path / ".checkpoint.json"
+    monkeypatch.setattr("pipeline.utils.CHECKPOINT_PATH", str(ckpt))
+
+    out = ingest_data(str(raw))
+    # readings are stored as float32, keys as categoricals
+    assert out["value"].dtype == np.float32
+    assert out["battery_level"].dtype == np.float32
+    assert isinstance(out["sensor_id"].dtype, pd.CategoricalDtype)
+    assert isinstance(out["reading_type"].dtype, pd.CategoricalDtype)
+    np.testing.assert_array_equal(out["value"].to_numpy(), df["value"].to_numpy(dtype=np.float32))
+    np.testing.assert_array_equal(out["battery_level"].to_numpy(), df["battery_level"].to_numpy(dtype=np.float32))
+    assert list(out["sensor_id"].astype(str)) == list(df["sensor_id"])
+    assert list(out["reading_type"].astype(str)) == list(df["reading_type"])
@@ -1,6 +1,7 @@
 import os
 import pandas as pd
 import numpy as np
+import pyarrow.parquet as pq
 import pytest
 
 # --- allow running from tests/ or project root
@@ -36,9 +37,40 @@ def test_store_data_writes_partitions(tmp_path):
     assert d1.exists() and d1.is_dir()
     assert d2.exists() and d2.is_dir()
 
-    # parquet files exist in each partition
-    assert any(p.suffix == ".parquet" for p in d1.iterdir())
-    assert any(p.suffix == ".parquet" for p in d2.iterdir())
+    # one file per date / sensor / reading_type partition
+    assert (d1 / "sensor_id=sensor_1" / "reading_type=temperature" / "part-0.parquet").is_file()
+    assert (d1 / "sensor_id=sensor_2" / "reading_type=humidity" / "part-0.parquet").is_file()
+    assert (d2 / "sensor_id=sensor_1" / "reading_type=temperature" / "part-0.parquet").is_file()
+    assert (d2 / "sensor_id=sensor_2" / "reading_type=humidity" / "part-0.parquet").is_file()
+    assert len(list(outdir.rglob("*.parquet"))) == 4
+
+
+def test_store_data_without_sensor_partition(tmp_path):
+    outdir = tmp_path / "processed"
+    store_data(_df_for_loading(), str(outdir), partition_by_sensor=False)
+
+    assert (outdir / "date=2025-06-01" / "reading_type=temperature" / "part-0.parquet").is_file()
+    assert not list(outdir.rglob("sensor_id=*"))
+
+
+def test_store_data_round_trips_columns_and_tz(tmp_path):
+    outdir = tmp_path / "processed"
+    df = _df_for_loading()
+    df["timestamp_ist"] = pd.to_datetime(df["timestamp"], utc=True).dt.tz_convert("Asia/Kolkata")
+    store_data(df, str(outdir))
+
+    # partition keys are encoded in the directory names, not in the files
+    part = outdir / "date=2025-06-01" / "sensor_id=sensor_1" / "reading_type=temperature" / "part-0.parquet"
+    assert not {"date", "sensor_id", "reading_type"} & set(pq.read_schema(part).names)
+
+    # reading the dataset root restores them
+    back = pd.read_parquet(outdir)
+    assert set(back.columns) == set(df.columns)
+    assert str(back["timestamp_ist"].dt.tz) == "Asia/Kolkata"
+    row = back[(back["date"] == "2025-06-01") & (back["sensor_id"] == "sensor_1")].iloc[0]
+    assert row["reading_type"] == "temperature"
+    assert row["value"] == 20.0
+    assert row["timestamp_ist"] == pd.Timestamp("2025-06-01T06:30:00", tz="Asia/Kolkata")
 
 
 def test_store_data_handles_empty_df(tmp_path):
@@ -48,3 +80,20 @@ def test_store_data_handles_empty_df(tmp_path):
     # assert no parquet files were produced
     if outdir.exists():
         assert not any(p.suffix == ".parquet" for p in outdir.rglob("*"))
+
+
+def test_store_data_sets_output_permissions(tmp_path):
+    outdir = tmp_path / "processed"
+    old_umask = os.umask(0o077)
+    try:
+        store_data(_df_for_loading(), str(outdir))
+        # the process umask is left untouched
+        assert os.umask(0o077) == 0o077
+    finally:
+        os.umask(old_umask)
+
+    files = [p for p in outdir.rglob("*") if p.is_file()]
+    dirs = [p for p in outdir.rglob("*") if p.is_dir()]
+    assert files and dirs
+    assert all(p.stat().st_mode & 0o777 == 0o666 for p in files)
+    assert all(p.stat().st_mode & 0o777 == 0o777 for p in dirs)
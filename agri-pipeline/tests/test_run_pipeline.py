@@ -0,0 +1,82 @@
+import sys
+import pandas as pd
+import numpy as np
+import pytest
+
+# --- allow running from tests/ or project root
+try:
+    import run_pipeline
+except ModuleNotFoundError:
+    import pathlib
+    sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+    import run_pipeline
+
+
+def _write_raw(raw, rows: int = 4):
+    pd.DataFrame({
+        "sensor_id": ["sensor_1"] * rows,
+        "timestamp": pd.date_range("2025-06-01", periods=rows, freq="h"),
+        "reading_type": ["temperature", "humidity"] * (rows // 2),
+        "value": np.linspace(20.0, 55.0, rows),
+        "battery_level": np.full(rows, 90.0),
+    }).to_parquet(raw / "2025-06-01.parquet", index=False)
+
+
+def _run(monkeypatch, tmp_path):
+    raw = tmp_path / "raw"
+    processed = tmp_path / "processed"
+    report = tmp_path / "reports" / "dq.csv"
+    monkeypatch.setattr("pipeline.utils.CHECKPOINT_PATH", str(tmp_path / ".checkpoint.json"))
+    monkeypatch.setattr(sys, "argv", [
+        "run_pipeline.py",
+        "--raw_dir", str(raw),
+        "--processed_dir", str(processed),
+        "--report_path", str(report),
+    ])
+    run_pipeline.main()
+    return processed, report
+
+
+def test_main_validates_and_stores_new_data(tmp_path, monkeypatch, capsys):
+    raw = tmp_path / "raw"; raw.mkdir()
+    _write_raw(raw)
+
+    processed, report = _run(monkeypatch, tmp_path)
+
+    assert report.exists()
+    assert any(p.suffix == ".parquet" for p in processed.rglob("*"))
+    assert "Processed rows: 4" in capsys.readouterr().out
+
+
+def test_main_skips_validation_when_no_new_data(tmp_path, monkeypatch, capsys):
+    (tmp_path / "raw").mkdir()
+
+    processed, report = _run(monkeypatch, tmp_path)
+
+    out = capsys.readouterr().out
+    assert not report.exists()
+    assert "No new data to validate" in out
+    # storage still runs (and writes nothing for an empty frame)
+    assert "Pipeline run complete." in out
+    assert not processed.exists() or not any(processed.rglob("*.parquet"))
+
+
+def test_main_opens_duckdb_only_for_large_frames(tmp_path, monkeypatch):
+    raw = tmp_path / "raw"; raw.mkdir()
+    _write_raw(raw, rows=6)
+    connects = []
+    real_connect = run_pipeline.duckdb.connect
+    monkeypatch.setattr(run_pipeline.duckdb, "connect", lambda *a, **k: connects.append(1) or real_connect(*a, **k))
+
+    # below the threshold validation runs in pandas without a connection
+    monkeypatch.setattr(run_pipeline, "SMALL_FRAME_ROWS", 7)
+    _, report = _run(monkeypatch, tmp_path)
+    assert report.exists() and connects == []
+
+    # at the threshold the run opens one shared connection
+    (tmp_path / ".checkpoint.json").unlink()
+    report.unlink()
+    monkeypatch.setattr(run_pipeline, "SMALL_FRAME_ROWS", 6)
+    monkeypatch.setattr("pipeline.validation.SMALL_FRAME_ROWS", 6)
+    _, report = _run(monkeypatch, tmp_path)
+    assert report.exists() and connects == [1]
@@ -55,10 +55,13 @@ def test_calibration_and_anomaly_logic():
     mult = CALIBRATION["temperature"]["multiplier"]
     off = CALIBRATION["temperature"]["offset"]
     expected = 25.0 * mult + off
-    assert np.isclose(temp_row["value"], expected, rtol=1e-6, atol=1e-6)
+    # raw value is kept; the calibrated reading goes to value_calibrated
+    assert temp_row["value"] == 25.0
+    assert np.isclose(temp_row["value_calibrated"], expected, rtol=1e-6, atol=1e-6)
 
     # Humidity 150 should be anomalous (outside 0..100)
-    hum = out[(out["reading_type"]=="humidity") & (out["timestamp_iso"].str.startswith("2025-06-01T02:00:00"))]
+    # timestamp_iso is in IST, so 02:00 UTC reads as 07:30+0530
+    hum = out[(out["reading_type"]=="humidity") & (out["timestamp_iso"].str.startswith("2025-06-01T07:30:00"))]
     assert not hum.empty
     assert bool(hum.iloc[0]["anomalous_reading"]) is True
 
@@ -78,3 +81,87 @@ def test_rolling_7d():
     block = daily[(daily.sensor_id=="sensor_1") & (daily.reading_type=="temperature")]
     expected = block["daily_avg"].mean()
     assert np.isclose(tail["rolling_7d"], expected, rtol=1e-6, atol=1e-6)
+
+
+def _random_df(n: int = 2000, days: int = 20, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    minutes = rng.integers(0, days * 24 * 60, n)
+    return pd.DataFrame({
+        "sensor_id": rng.choice(["sensor_1", "sensor_2", "sensor_3"], n),
+        "timestamp": (pd.Timestamp("2025-06-01") + pd.to_timedelta(minutes, unit="min")).astype(str),
+        "reading_type": rng.choice(list(CALIBRATION), n),
+        "value": rng.uniform(-20, 150, n).round(2),
+        "battery_level": rng.uniform(20, 100, n).round(2),
+    })
+
+
+def test_float32_input_matches_float64():
+    # ingestion stores value/battery_level as float32; results must stay
+    # within float32 precision of a float64 run
+    df = _random_df()
+    ref = transform_data(df)
+    out = transform_data(df.astype({"value": "float32", "battery_level": "float32"}))
+
+    assert out["value_calibrated"].dtype == np.float32
+    for c in ["value_calibrated", "zscore", "value_corrected", "daily_avg", "rolling_7d"]:
+        np.testing.assert_allclose(out[c].astype(np.float64), ref[c], rtol=1e-6, atol=1e-6)
+    assert (out["anomalous_reading"] == ref["anomalous_reading"]).all()
+
+
+def test_rolling_7d_matches_pandas_rolling():
+    # 20 days per group so windows slide past the first 7 days; one day has
+    # only missing values and drops out of the daily series
+    df = _random_df(days=20, seed=1)
+    df.loc[df["timestamp"].str.startswith("2025-06-09"), "value"] = np.nan
+    out = transform_data(df)
+
+    keys = ["sensor_id", "reading_type", "date"]
+    daily = out[keys + ["daily_avg", "rolling_7d"]].drop_duplicates(keys).sort_values(keys)
+    expected = (
+        daily.groupby(["sensor_id", "reading_type"], observed=True)["daily_avg"]
+        .rolling(7, min_periods=1).mean()
+        .reset_index(level=[0, 1], drop=True)
+    )
+    assert daily["date"].nunique() > 7
+    np.testing.assert_allclose(daily["rolling_7d"], expected.loc[daily.index], rtol=1e-9, atol=1e-9)
+
+
+def test_categorical_input_matches_object_input():
+    # ingestion hands over categoricals whose category order follows the
+    # data, not READING_TYPES; unknown types must keep neutral parameters
+    df = _random_df(n=500, seed=2)
+    df.loc[df.index[:20], "reading_type"] = "leaf_wetness"
+    cat = df.astype({"sensor_id": "category", "reading_type": pd.CategoricalDtype(
+        sorted(df["reading_type"].unique(), reverse=True))})
+
+    ref = transform_data(df)
+    out = transform_data(cat)
+    for c in ["value_calibrated", "zscore", "value_corrected", "anomalous_reading", "daily_avg", "rolling_7d"]:
+        np.testing.assert_array_equal(out[c].to_numpy(), ref[c].to_numpy())
+    assert list(out["reading_type"].astype(str)) == list(ref["reading_type"].astype(str))
+
+    unknown = out[out["reading_type"] == "leaf_wetness"]
+    np.testing.assert_array_equal(unknown["value_calibrated"], unknown["value"])
+    assert not unknown["anomalous_reading"].any()
+    known = out[out["reading_type"] == "temperature"]
+    params = CALIBRATION["temperature"]
+    np.testing.assert_allclose(known["value_calibrated"], known["value"] * params["multiplier"] + params["offset"])
+
+
+def test_timestamp_iso_and_date_in_ist():
+    df = pd.DataFrame({
+        "sensor_id": ["sensor_1"] * 4,
+        # 20:00 UTC is already the next day in IST
+        "timestamp": ["2025-06-01T20:00:00", "2025-06-01T01:15:30", "2025-06-02T10:00:00", "not a time"],
+        "reading_type": ["temperature"] * 4,
+        "value": [25.0, 26.0, 27.0, 28.0],
+        "battery_level": [80.0] * 4,
+    })
+    out = transform_data(df)
+
+    assert list(out["timestamp_iso"][:3]) == [
+        "2025-06-02T01:30:00+0530", "2025-06-01T06:45:30+0530", "2025-06-02T15:30:00+0530",
+    ]
+    assert list(out["date"]) == ["2025-06-02", "2025-06-01", "2025-06-02", "NaT"]
+    assert pd.isna(out["timestamp_iso"].iloc[3])
+    assert out["hour"].iloc[0] == pd.Timestamp("2025-06-02 01:00", tz="Asia/Kolkata")
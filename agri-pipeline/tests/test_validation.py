@@ -5,11 +5,11 @@ import pytest
 
 # --- allow running from tests/ or project root
 try:
-    from pipeline.validation import validate_data
+    from pipeline.validation import validate_data, _hourly_gaps
 except ModuleNotFoundError:
     import sys, pathlib
     sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
-    from pipeline.validation import validate_data
+    from pipeline.validation import validate_data, _hourly_gaps
 
 
 def test_validation_skips_empty_df(tmp_path, caplog):
@@ -67,4 +67,105 @@ def test_validation_detects_bad_types(tmp_path):
     assert report_path.exists()
     txt = report_path.read_text()
     assert "invalid_value_type" in txt
-    assert "invalid_timestamp_type" in txt
+    assert "invalid_timestamp_storage_type" in txt
+    # the string value is flagged; a datetime timestamp is a valid storage type
+    assert "## type_checks\ninvalid_value_type,invalid_timestamp_storage_type,unparsable_timestamp_rows\n1.0,0.0,0.0\n" in txt
+
+
+def test_validation_report_number_formatting(tmp_path):
+    df = pd.DataFrame({
+        "sensor_id": ["sensor_1", "sensor_1"],
+        "timestamp": pd.to_datetime(["2025-06-01 01:30:00", "2025-06-01 04:00:00"]),
+        "reading_type": ["humidity", "humidity"],
+        "value": [1.25, 3.0],
+        "battery_level": [50.0, 50.0],
+    })
+
+    report_path = tmp_path / "dq_format.csv"
+    validate_data(df, str(report_path))
+    # check counts print as floats (0.0), whole-number values keep their .0
+    assert report_path.read_text() == (
+        "## type_checks\n"
+        "invalid_value_type,invalid_timestamp_storage_type,unparsable_timestamp_rows\n"
+        "0.0,0.0,0.0\n\n\n"
+        "## range_checks\n"
+        "reading_type,min_value,max_value\n"
+        "humidity,1.25,3.0\n\n\n"
+        "## missing\n"
+        "reading_type,total,missing_values\n"
+        "humidity,2,0.0\n\n\n"
+        "## gaps\n"
+        "sensor_id,reading_type,expected_hours,actual_hours,missing_hours\n"
+        "sensor_1,humidity,4,2,2\n\n\n"
+        "## profile\n"
+        "reading_type,total,null_values\n"
+        "humidity,2,0.0\n\n\n"
+    )
+
+
+def test_hourly_gaps_counts_distinct_hours():
+    sensor_id = np.array(["s2", "s1", "s1", "s1", "s1", "s2"], dtype=object)
+    reading_type = np.array(["temperature"] * 6, dtype=object)
+    # s1: hours 10, 10, 12, 19 -> span 10 (crosses a byte boundary), 3 seen
+    hours = np.array([5, 10, 10, 12, 19, 5], dtype=np.int64)
+    gaps = _hourly_gaps(sensor_id, reading_type, hours)
+
+    assert list(gaps["sensor_id"]) == ["s1", "s2"]
+    assert list(gaps["expected_hours"]) == [10, 1]
+    assert list(gaps["actual_hours"]) == [3, 1]
+    assert list(gaps["missing_hours"]) == [7, 0]
+
+
+def test_hourly_gaps_sparse_wide_span():
+    # One far-off hour would need ~125 GB of bitset; the sort path handles it
+    sensor_id = np.array(["s1", "s1", "s1", "s1", "s2"], dtype=object)
+    reading_type = np.array(["humidity"] * 5, dtype=object)
+    hours = np.array([0, 1, 1, 10**12, 7], dtype=np.int64)
+    gaps = _hourly_gaps(sensor_id, reading_type, hours)
+
+    assert list(gaps["expected_hours"]) == [10**12 + 1, 1]
+    assert list(gaps["actual_hours"]) == [3, 1]
+    assert list(gaps["missing_hours"]) == [10**12 - 2, 0]
+
+
+@pytest.mark.parametrize("df", [
+    pd.DataFrame({
+        "sensor_id": ["sensor_2", "sensor_1", "sensor_1", "sensor_1", "sensor_2"],
+        "timestamp": ["2025-06-01 00:10:00", "2025-06-01 00:59:00", "2025-06-01 03:00:00",
+                      "2025-06-01 03:30:00", "2025-06-01 05:00:00"],
+        "reading_type": pd.Categorical(["humidity", "temperature", "temperature", "humidity", "humidity"]),
+        "value": np.array([55.5, np.nan, 21.25, 1e-7, 3e12], dtype=np.float32),
+    }),
+    pd.DataFrame({
+        "sensor_id": ["s1", "s1", "s2"],
+        "timestamp": ["2025-06-01 01:30:00", "garbage", None],
+        "reading_type": ["b", "a", "b"],
+        "value": [1.5, np.nan, 3.0],
+    }),
+    pd.DataFrame({
+        "sensor_id": ["s1", "s1"],
+        "timestamp": pd.to_datetime(["2025-06-01 01:30:00", "2025-06-02 04:00:00"], utc=True),
+        "reading_type": ["b", "b"],
+        "value": [1, 3],
+    }),
+    pd.DataFrame({
+        "sensor_id": ["s1", "s2"],
+        "timestamp": [pd.Timestamp("2025-06-01"), pd.Timestamp("2025-06-01 02:00")],
+        "reading_type": ["humidity", "temperature"],
+        "value": ["oops", "12"],
+    }),
+    pd.DataFrame({
+        "sensor_id": ["s1", "s1", "s1"],
+        "timestamp": ["1969-12-31 22:10:00", "1969-12-31 23:30:00", "1970-01-01 00:30:00"],
+        "reading_type": ["humidity", "humidity", "humidity"],
+        "value": [40.0, 41.0, 42.0],
+    }),
+], ids=["float32_categorical", "unparsable_timestamps", "tz_aware_ints", "string_values", "pre_epoch"])
+def test_validation_pandas_and_duckdb_paths_match(df, tmp_path, monkeypatch):
+    reports = []
+    for threshold in (len(df) + 1, 0):  # pandas path, then DuckDB path
+        monkeypatch.setattr("pipeline.validation.SMALL_FRAME_ROWS", threshold)
+        report_path = tmp_path / f"dq_{threshold}.csv"
+        validate_data(df.copy(), str(report_path))
+        reports.append(report_path.read_text())
+    assert reports[0] == reports[1]